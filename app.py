@@ -1,28 +1,61 @@
-import sys, os, time, traceback
+import sys, os, re, shutil, traceback
 from pathlib import Path
-from functools import partial
-
-from PyQt6 import QtCore, QtGui, QtWidgets, QtSvg
-
-try:
-    import pandas as pd
-except:
-    pd = None
-
-try:
-    import sqlparse
-    from sqlparse import format as sql_format
-except:
-    sqlparse = None
-    sql_format = None
-
-# fuzzy ratio
-try:
-    import Levenshtein
-    def fuzzy_ratio(a,b): return Levenshtein.ratio(a,b)
-except:
-    import difflib
-    def fuzzy_ratio(a,b): return difflib.SequenceMatcher(None,a,b).ratio()
+from functools import partial, lru_cache
+from bisect import bisect_left
+from array import array
+from itertools import groupby
+from operator import itemgetter
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+# sqlparse / Levenshtein are heavy and only needed on first format or autocomplete,
+# so they are imported on first use rather than at startup
+sql_format = None
+
+def _get_sql_format():
+    global sql_format
+    if sql_format is None:
+        try:
+            from sqlparse import format as _sql_format
+        except ImportError:
+            return None
+        sql_format = _sql_format
+    return sql_format
+
+def _bounded_ratio(a, b, threshold=None):
+    n, m = len(a), len(b)
+    if threshold is None:
+        threshold = max(n, m)
+    if abs(n - m) > threshold:
+        return 0.0
+    # two-row Levenshtein DP, bailing out once every cell in a row exceeds threshold
+    prev = array('i', range(m + 1))
+    curr = array('i', [0]) * (m + 1)
+    for i in range(1, n + 1):
+        curr[0] = i
+        ca = a[i - 1]
+        for j in range(1, m + 1):
+            curr[j] = min(prev[j] + 1, curr[j - 1] + 1, prev[j - 1] + (ca != b[j - 1]))
+        if min(curr) > threshold:
+            return 0.0
+        prev, curr = curr, prev
+    return 1.0 - prev[m] / (max(n, m) or 1)
+
+# fuzzy ratio; `threshold` is the max edit distance worth scoring (None = no cutoff).
+# The first call picks a backend and rebinds this name to it, so later calls don't branch.
+def fuzzy_ratio(a, b, threshold=None):
+    global fuzzy_ratio
+    try:
+        import Levenshtein
+    except ImportError:
+        fuzzy_ratio = _bounded_ratio
+    else:
+        def _levenshtein_ratio(a, b, threshold=None):
+            if threshold is not None and abs(len(a) - len(b)) > threshold:
+                return 0.0
+            return Levenshtein.ratio(a, b)
+        fuzzy_ratio = _levenshtein_ratio
+    return fuzzy_ratio(a, b, threshold)
 
 BASE = Path(__file__).resolve().parent
 LOG_FILE = os.getenv("LOG_FILE", "oracle_to_mssql.log")
@@ -42,19 +75,168 @@ SNIPPETS = {
     "upd": "UPDATE \nSET \nWHERE ;",
     "jn": "JOIN  ON "
 }
-
+# All completions, built once instead of per Tab press
+_CANDIDATES = tuple(AUTOCOMP_WORDS) + tuple(SNIPPETS.keys())
+_SNIPPET_KEYS = frozenset(k.lower() for k in SNIPPETS)
+# (completion, lowercased) pairs so suggestions never lowercase per keystroke
+_AUTOCOMP_PAIRS = tuple((c, c.lower()) for c in _CANDIDATES)
+# Sorted lowercase completions for bisect prefix lookup, mapped back to display case
+AUTOCOMP_SORTED = sorted(cl for _, cl in _AUTOCOMP_PAIRS)
+AUTOCOMP_CASE = {cl: c for c, cl in _AUTOCOMP_PAIRS}
+# Character bigrams per completion for the cheap first-stage fuzzy score
+BIGRAMS = {c: set(zip(cl, cl[1:])) for c, cl in _AUTOCOMP_PAIRS}
+# fuzzy matches at or below this ratio are dropped from the popup
+FUZZY_MIN_RATIO = 0.2
+# Keywords coloured by the SQL highlighter
+SQL_KEYWORDS = (
+    'select','from','where','and','or','order','by','group','having','limit',
+    'join','inner','left','right','full','on','as','distinct','union','all',
+    'case','when','then','else','end','insert','into','values','update','set',
+    'delete','create','table','view','with','merge', 'alter'
+)
+
+# Single-pass SQL lexer shared by the highlighter and validate_query. Alternatives are
+# tried in order at each position; whitespace is skipped by finditer.
+_SQL_TOKEN_RE = re.compile("|".join(f"(?P<{kind}>{pat})" for kind, pat in (
+    ("COMMENT", r"--[^\n]*|/\*(?s:.*?)\*/"),
+    # Oracle q'...' / nq'...' literals: bracket pairs close with their partner, anything else with itself
+    ("STR", r"n?q'\[(?s:.*?)\]'|n?q'\{(?s:.*?)\}'|n?q'\((?s:.*?)\)'|n?q'<(?s:.*?)>'"
+            r"|n?q'(?P<qdelim>[^\s\[{(<])(?s:.*?)(?P=qdelim)'"
+            r"|'(?:[^']|'')*'|\"[^\"]*\""),
+    ("UNCLOSED_COMMENT", r"/\*"),
+    ("UNTERMINATED", r"['\"]"),
+    ("NUM", r"\b[0-9]+\b"),
+    ("KW", r"\b(?:" + "|".join(map(re.escape, SQL_KEYWORDS)) + r")\b"),
+    ("IDENT", r"\w+"),
+    ("PUNCT", r"[^\w\s]"),
+)), re.IGNORECASE)
+
+
+def tokenize_sql(text: str):
+    """Yield (kind, start, end) for each token in text."""
+    for m in _SQL_TOKEN_RE.finditer(text):
+        yield m.lastgroup, m.start(), m.end()
+
+
+def find_sql_error(text: str):
+    """Return (offset, message) for the first lexical error in text, or None."""
+    depth = []
+    for kind, start, _ in tokenize_sql(text):
+        if kind == "UNCLOSED_COMMENT":
+            return start, "Unterminated block comment."
+        if kind == "UNTERMINATED":
+            return start, "Unterminated quoted string."
+        if kind == "PUNCT":
+            ch = text[start]
+            if ch == "(":
+                depth.append(start)
+            elif ch == ")":
+                if not depth:
+                    return start, "Unmatched closing parenthesis."
+                depth.pop()
+    if depth:
+        return depth[-1], "Unclosed parenthesis."
+    return None
+
+# validate_query checks, compiled once; word boundaries keep e.g. `updated_at` from tripping them
+_SELECT_RE = re.compile(r"^\s*select\b", re.IGNORECASE)
+_FROM_RE = re.compile(r"\bfrom\b", re.IGNORECASE)
+_FORBIDDEN_RE = re.compile(
+    r"\b(insert|update|delete|drop|alter|truncate|merge|create|exec|grant|revoke)\s*[(\s]",
+    re.IGNORECASE,
+)
+
+
+
+# Log line colouring in one regex pass. Each branch is a lookahead from the start of
+# the line so the alternation order (not match position) decides the winner.
+_LOG_CLS = re.compile(
+    r"^(?:(?=.*?(?P<err>error|traceback))"
+    r"|(?=.*?(?P<ok>success|completed|\bok\b))"
+    r"|(?=.*?(?P<warn>warn))"
+    r"|(?=.*?(?P<info>info)))",
+    re.IGNORECASE | re.DOTALL,
+)
+_LOG_COLORS = {"err": "#ff6b6b", "ok": "#67e667", "warn": "#f7d06b", "info": "#7fb6ff"}
+LOG_DEFAULT_COLOR = "#c7c7c7"
+
+
+def log_color(line: str) -> str:
+    m = _LOG_CLS.match(line)
+    return _LOG_COLORS[m.lastgroup] if m else LOG_DEFAULT_COLOR
+
+
+_LOG_FORMATS: dict[str, QtGui.QTextCharFormat] = {}
+
+
+def _fmt_for(color: str) -> QtGui.QTextCharFormat:
+    fmt = _LOG_FORMATS.get(color)
+    if fmt is None:
+        fmt = QtGui.QTextCharFormat()
+        fmt.setForeground(QtGui.QBrush(QtGui.QColor(color)))
+        fmt.setFont(QtGui.QFont("Consolas", 10))
+        _LOG_FORMATS[color] = fmt
+    return fmt
 
 
 def append_colored(log_widget: QtWidgets.QTextEdit, text: str, color: str):
+    append_colored_batch(log_widget, [(text, color)])
+
+
+def append_colored_batch(log_widget: QtWidgets.QTextEdit, segments):
+    """
+    Insert (text, color) segments with one cursor and a single scroll-to-end.
+    Plain insertText with cached formats (no HTML parsing); runs of the same colour
+    are joined so each run is one insert.
+    """
     cursor = log_widget.textCursor()
     cursor.movePosition(QtGui.QTextCursor.MoveOperation.End)
-    fmt = QtGui.QTextCharFormat()
-    fmt.setForeground(QtGui.QBrush(QtGui.QColor(color)))
-    fmt.setFont(QtGui.QFont("Consolas", 10))
-    cursor.insertText(text, fmt)
+    for color, run in groupby(segments, key=itemgetter(1)):
+        cursor.insertText("".join(text for text, _ in run), _fmt_for(color))
     log_widget.setTextCursor(cursor)
     log_widget.ensureCursorVisible()
 
+# sqlparse's grouping passes blow up on huge statements / IN-lists; above these
+# limits Format Query falls back to a plain clause-per-line indenter
+FORMAT_MAX_CHARS = 50_000
+FORMAT_MAX_COMMAS = 500
+_CLAUSE_KWS = frozenset({"select", "from", "where", "join", "on", "group", "order"})
+
+def _break_clauses(text: str) -> str:
+    """Start each major clause on its own line; strings and comments are left untouched."""
+    tokens = list(tokenize_sql(text))
+    out, pos, i = [], 0, 0
+    while i < len(tokens):
+        kind, start, end = tokens[i]
+        word = text[start:end].lower()
+        if kind == "KW" and word in _CLAUSE_KWS:
+            if word in ("group", "order"):
+                # only GROUP BY / ORDER BY open a clause
+                if i + 1 >= len(tokens) or text[tokens[i + 1][1]:tokens[i + 1][2]].lower() != "by":
+                    i += 1
+                    continue
+                i += 1
+                end = tokens[i][2]
+                word += " by"
+            out.append(text[pos:start].rstrip() + "\n" + word.upper())
+            pos = end
+        i += 1
+    out.append(text[pos:])
+    return "".join(out).lstrip("\n")
+
+def format_query(text: str) -> str:
+    # huge inputs take the cheap path uncached so the cache never pins multi-MB strings
+    if len(text) > FORMAT_MAX_CHARS:
+        return _break_clauses(text)
+    return _format_cached(text)
+
+@lru_cache(maxsize=16)
+def _format_cached(text: str) -> str:
+    # repeated Format Query clicks on unchanged text skip sqlparse entirely
+    if text.count(',') > FORMAT_MAX_COMMAS:
+        return _break_clauses(text)
+    return _get_sql_format()(text, reindent=True, keyword_case='upper')
+
 # ---------------- ToggleSwitch (custom widget) ----------------
 class ToggleSwitch(QtWidgets.QAbstractButton):
     """
@@ -112,27 +294,12 @@ class ToggleSwitch(QtWidgets.QAbstractButton):
 
 # ---------------- SQL Highlighter ----------------
 class SQLHighlighter(QtGui.QSyntaxHighlighter):
+    # token kind -> QTextCharFormat, shared by every instance; built once on first use
+    _FORMATS = None
+
     def __init__(self, doc):
         super().__init__(doc)
-        self.rules = []
-        kwfmt = QtGui.QTextCharFormat()
-        kwfmt.setForeground(QtGui.QColor("#9cdcfe"))
-        kwfmt.setFontWeight(QtGui.QFont.Weight.Bold)
-        keywords = [
-            'select','from','where','and','or','order','by','group','having','limit',
-            'join','inner','left','right','full','on','as','distinct','union','all',
-            'case','when','then','else','end','insert','into','values','update','set',
-            'delete','create','table','view','with','merge', 'alter'
-        ]
-        for kw in keywords:
-            self.rules.append((QtCore.QRegularExpression(rf"(?i)\b{kw}\b"), kwfmt))
-        numfmt = QtGui.QTextCharFormat(); numfmt.setForeground(QtGui.QColor("#b5cea8"))
-        self.rules.append((QtCore.QRegularExpression(r"\b[0-9]+\b"), numfmt))
-        strfmt = QtGui.QTextCharFormat(); strfmt.setForeground(QtGui.QColor("#ce9178"))
-        self.rules.append((QtCore.QRegularExpression(r"'[^']*'"), strfmt))
-        self.rules.append((QtCore.QRegularExpression(r'"[^"]*"'), strfmt))
-        comfmt = QtGui.QTextCharFormat(); comfmt.setForeground(QtGui.QColor("#6a9955"))
-        self.rules.append((QtCore.QRegularExpression(r"--[^\n]*"), comfmt))
+        self.formats = self._build_formats()
         self.errfmt = QtGui.QTextCharFormat()
         try:
             self.errfmt.setUnderlineStyle(QtGui.QTextCharFormat.UnderlineStyle.WaveUnderline)
@@ -140,12 +307,24 @@ class SQLHighlighter(QtGui.QSyntaxHighlighter):
             self.errfmt.setUnderlineStyle(QtGui.QTextCharFormat.UnderlineStyle.SingleUnderline)
         self.errfmt.setUnderlineColor(QtGui.QColor("#ff6b6b"))
 
+    @classmethod
+    def _build_formats(cls):
+        if cls._FORMATS is not None:
+            return cls._FORMATS
+        kwfmt = QtGui.QTextCharFormat()
+        kwfmt.setForeground(QtGui.QColor("#9cdcfe"))
+        kwfmt.setFontWeight(QtGui.QFont.Weight.Bold)
+        numfmt = QtGui.QTextCharFormat(); numfmt.setForeground(QtGui.QColor("#b5cea8"))
+        strfmt = QtGui.QTextCharFormat(); strfmt.setForeground(QtGui.QColor("#ce9178"))
+        comfmt = QtGui.QTextCharFormat(); comfmt.setForeground(QtGui.QColor("#6a9955"))
+        cls._FORMATS = {"KW": kwfmt, "NUM": numfmt, "STR": strfmt, "COMMENT": comfmt}
+        return cls._FORMATS
+
     def highlightBlock(self, text: str):
-        for pattern, fmt in self.rules:
-            it = pattern.globalMatch(text)
-            while it.hasNext():
-                m = it.next()
-                self.setFormat(m.capturedStart(), m.capturedLength(), fmt)
+        for kind, start, end in tokenize_sql(text):
+            fmt = self.formats.get(kind)
+            if fmt is not None:
+                self.setFormat(start, end - start, fmt)
 
 # ---------------- Editor + placeholder overlay + suggestions ----------------
 class LineNumberArea(QtWidgets.QWidget):
@@ -162,12 +341,16 @@ class SqlEditor(QtWidgets.QPlainTextEdit):
 
     def __init__(self):
         super().__init__()
+        self._lna_cache = (-1, 0)  # (blockCount, width); reset on font change
+        self._placeholder_pix = None  # (QPixmap, baseline offset); built on first empty paint
         self.setFont(QtGui.QFont("Consolas", 11))
         self.setTabStopDistance(QtGui.QFontMetricsF(self.font()).horizontalAdvance(' ') * 4)
         self.lineNumberArea = LineNumberArea(self)
         self.blockCountChanged.connect(self.updateLineNumberAreaWidth)
         self.updateRequest.connect(self._on_update_request)
-        self.cursorPositionChanged.connect(self.highlightCurrentLine)
+        self._hl_pending = False
+        self._error_sel = []  # ExtraSelection underlining the current syntax error
+        self.cursorPositionChanged.connect(self._schedule_hl)
         self.updateLineNumberAreaWidth(0)
         self.highlighter = SQLHighlighter(self.document())
         self.setWordWrapMode(QtGui.QTextOption.WrapMode.NoWrap)
@@ -184,8 +367,20 @@ class SqlEditor(QtWidgets.QPlainTextEdit):
         return QtCore.QSize(600, 400)
 
     def lineNumberAreaWidth(self):
-        digits = len(str(max(1, self.blockCount())))
-        return 8 + self.fontMetrics().horizontalAdvance('9') * digits
+        bc = self.blockCount()
+        if bc == self._lna_cache[0]:
+            return self._lna_cache[1]
+        digits = len(str(max(1, bc)))
+        width = 8 + self.fontMetrics().horizontalAdvance('9') * digits
+        self._lna_cache = (bc, width)
+        return width
+
+    def changeEvent(self, event):
+        if event.type() == QtCore.QEvent.Type.FontChange:
+            self._lna_cache = (-1, 0)
+            self._placeholder_pix = None
+            self.updateLineNumberAreaWidth(0)
+        super().changeEvent(event)
 
     def updateLineNumberAreaWidth(self, _):
         self.setViewportMargins(self.lineNumberAreaWidth(), 0, 0, 0)
@@ -208,7 +403,9 @@ class SqlEditor(QtWidgets.QPlainTextEdit):
         block = self.firstVisibleBlock()
         blockNumber = block.blockNumber()
         top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
-        bottom = top + self.blockBoundingRect(block).height()
+        # no wrap + one font: every block is one line of the same height
+        line_h = self.blockBoundingRect(block).height()
+        bottom = top + line_h
         fm = self.fontMetrics()
         painter.setPen(QtGui.QColor("#6b6f75") if is_dark else QtGui.QColor("#8a8a8a"))
         while block.isValid() and top <= event.rect().bottom():
@@ -218,9 +415,20 @@ class SqlEditor(QtWidgets.QPlainTextEdit):
                                  QtCore.Qt.AlignmentFlag.AlignRight, number)
             block = block.next()
             top = bottom
-            bottom = top + self.blockBoundingRect(block).height()
+            bottom = top + line_h
             blockNumber += 1
 
+    def _schedule_hl(self):
+        # one repaint per autorepeat/paste burst instead of one per cursor move
+        if self._hl_pending:
+            return
+        self._hl_pending = True
+        QtCore.QTimer.singleShot(16, self._do_hl)
+
+    def _do_hl(self):
+        self._hl_pending = False
+        self.highlightCurrentLine()
+
     def highlightCurrentLine(self):
         extras = []
         if not self.isReadOnly():
@@ -229,22 +437,52 @@ class SqlEditor(QtWidgets.QPlainTextEdit):
             sel.cursor = self.textCursor()
             sel.cursor.clearSelection()
             extras.append(sel)
-        self.setExtraSelections(extras)
+        self.setExtraSelections(extras + self._error_sel)
+
+    def set_error_range(self, start, end):
+        """Wave-underline [start, end) as an extra selection; the document is untouched."""
+        sel = QtWidgets.QTextEdit.ExtraSelection()
+        sel.format = QtGui.QTextCharFormat(self.highlighter.errfmt)
+        cur = QtGui.QTextCursor(self.document())
+        cur.setPosition(start)
+        cur.setPosition(end, QtGui.QTextCursor.MoveMode.KeepAnchor)
+        sel.cursor = cur
+        self._error_sel = [sel]
+        self.highlightCurrentLine()
+
+    def clear_error(self):
+        if self._error_sel:
+            self._error_sel = []
+            self.highlightCurrentLine()
 
     # placeholder overlay draw
     def paintEvent(self, event):
         super().paintEvent(event)
         if not self.toPlainText().strip():
             # draw placeholder text in editor's viewport
+            pix, ascent = self._placeholder_pixmap()
             painter = QtGui.QPainter(self.viewport())
-            painter.setPen(QtGui.QColor("#6b6f75"))
-            font = QtGui.QFont("Consolas", 11)
-            font.setItalic(True)
-            painter.setFont(font)
             margin = 6
-            painter.drawText(margin+4, margin+18, self.placeholder)
+            painter.drawPixmap(margin+4, margin+18 - ascent, pix)
             painter.end()
 
+    def _placeholder_pixmap(self):
+        if self._placeholder_pix is None:
+            font = QtGui.QFont("Consolas", 11)
+            font.setItalic(True)
+            fm = QtGui.QFontMetrics(font)
+            dpr = self.devicePixelRatioF()
+            pix = QtGui.QPixmap(int((fm.horizontalAdvance(self.placeholder) + 2) * dpr), int(fm.height() * dpr))
+            pix.setDevicePixelRatio(dpr)
+            pix.fill(QtCore.Qt.GlobalColor.transparent)
+            p = QtGui.QPainter(pix)
+            p.setPen(QtGui.QColor("#6b6f75"))
+            p.setFont(font)
+            p.drawText(0, fm.ascent(), self.placeholder)
+            p.end()
+            self._placeholder_pix = (pix, fm.ascent())
+        return self._placeholder_pix
+
     def _current_word(self):
         tc = self.textCursor()
         tc.select(QtGui.QTextCursor.SelectionType.WordUnderCursor)
@@ -257,20 +495,49 @@ class SqlEditor(QtWidgets.QPlainTextEdit):
 
     def show_suggestions(self, manual_prefix=None):
         prefix = manual_prefix if manual_prefix is not None else self._current_word()
-        candidates = AUTOCOMP_WORDS + list(SNIPPETS.keys())
-        scored = []
-        pref = prefix.strip()
-        for c in candidates:
-            score = fuzzy_ratio(pref.lower(), c.lower()) if pref else 0.5
-            if pref.lower() in c.lower(): score += 0.2
-            if score > 0.2:
-                scored.append((score, c))
-        scored.sort(key=lambda x: -x[0])
-        if not scored:
+        pref = prefix.strip().lower()
+        if not pref:
+            matches = list(_CANDIDATES[:12])
+        else:
+            # exact prefix hits first: O(log N + k) over the sorted list
+            matches = []
+            i = bisect_left(AUTOCOMP_SORTED, pref)
+            while i < len(AUTOCOMP_SORTED) and AUTOCOMP_SORTED[i].startswith(pref) and len(matches) < 12:
+                matches.append(AUTOCOMP_CASE[AUTOCOMP_SORTED[i]])
+                i += 1
+            # then substring hits, still without any scoring
+            if len(matches) < 12:
+                for c, cl in _AUTOCOMP_PAIRS:
+                    if pref in cl and not cl.startswith(pref):
+                        matches.append(c)
+                        if len(matches) == 12:
+                            break
+            # fuzzy-rank the rest only if the popup isn't full yet: bigram Jaccard
+            # picks a shortlist, edit distance only re-ranks that shortlist
+            if len(matches) < 12:
+                pb = set(zip(pref, pref[1:]))
+                shortlist = []
+                for c, cl in _AUTOCOMP_PAIRS:
+                    if pref in cl:
+                        continue
+                    cb = BIGRAMS[c]
+                    coarse = len(pb & cb) / max(len(pb | cb), 1)
+                    if coarse > 0:
+                        shortlist.append((coarse, c, cl))
+                shortlist.sort(key=lambda x: -x[0])
+                scored = []
+                for coarse, c, cl in shortlist[:12]:
+                    threshold = int(max(len(pref), len(cl)) * (1 - FUZZY_MIN_RATIO))
+                    score = fuzzy_ratio(pref, cl, threshold)
+                    if score > FUZZY_MIN_RATIO:
+                        scored.append((score, coarse, c))
+                scored.sort(key=lambda x: (-x[0], -x[1]))
+                matches += [c for _, _, c in scored[:12 - len(matches)]]
+        if not matches:
             self.sugg.hide()
             return
         self.sugg.clear()
-        for s,c in scored[:12]:
+        for c in matches:
             it = QtWidgets.QListWidgetItem(c)
             self.sugg.addItem(it)
         cr = self.cursorRect()
@@ -297,7 +564,7 @@ class SqlEditor(QtWidgets.QPlainTextEdit):
         mods = e.modifiers()
         if key == QtCore.Qt.Key.Key_Tab:
             cur = self._current_word()
-            if cur and cur.lower() in SNIPPETS:
+            if cur and cur.lower() in _SNIPPET_KEYS:
                 self._insert_snippet(SNIPPETS[cur.lower()]); return
             self.show_suggestions(); return
         if key == QtCore.Qt.Key.Key_Space and mods & QtCore.Qt.KeyboardModifier.ControlModifier:
@@ -349,17 +616,33 @@ class MiniMap(QtWidgets.QPlainTextEdit):
         super().__init__()
         self.editor = editor
         self.setReadOnly(True)
+        # overview only: no undo stack, no margins, no selection/caret handling
+        self.setUndoRedoEnabled(False)
+        self.document().setDocumentMargin(0)
+        self.setTextInteractionFlags(QtCore.Qt.TextInteractionFlag.NoTextInteraction)
         self.setFont(QtGui.QFont("Consolas", 6))
         self.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
         self.setStyleSheet("background:transparent; color:#7d7d7d;")
         # sync text and scroll
         self._ignore_editor_scroll = False
-        self.editor.textChanged.connect(self._sync_text)
+        self._pending = False
+        self.editor.textChanged.connect(self._schedule_sync)
         self.editor.verticalScrollBar().valueChanged.connect(self._on_editor_scrolled)
         self.verticalScrollBar().valueChanged.connect(self._on_minimap_scrolled)
         self.setPlainText(self.editor.toPlainText())
 
+    def _schedule_sync(self):
+        # coalesce a burst of keystrokes into one minimap rebuild
+        if self._pending:
+            return
+        self._pending = True
+        QtCore.QTimer.singleShot(80, self._do_sync)
+
+    def _do_sync(self):
+        self._pending = False
+        self._sync_text()
+
     def _sync_text(self):
         ed_sb = self.editor.verticalScrollBar()
         cur_val = ed_sb.value()
@@ -418,25 +701,18 @@ class MiniMap(QtWidgets.QPlainTextEdit):
             QtCore.QTimer.singleShot(30, lambda: setattr(self, "_ignore_editor_scroll", False))
 
 
-# ---------------- Log tail worker ----------------
-class LogTailWorker(QtCore.QThread):
-    new_line = QtCore.pyqtSignal(str)
-    def __init__(self, path):
+# ---------------- Syntax check task ----------------
+class _SyntaxCheckSignals(QtCore.QObject):
+    done = QtCore.pyqtSignal(str, object)
+
+class SyntaxCheckTask(QtCore.QRunnable):
+    """Runs find_sql_error on a thread-pool thread and reports (text, error) back."""
+    def __init__(self, text):
         super().__init__()
-        self.path = path
-        self._stop = False
+        self.text = text
+        self.signals = _SyntaxCheckSignals()
     def run(self):
-        Path(self.path).touch(exist_ok=True)
-        with open(self.path, "r", encoding="utf-8", errors="ignore") as f:
-            f.seek(0, os.SEEK_END)
-            while not self._stop:
-                line = f.readline()
-                if line:
-                    self.new_line.emit(line)
-                else:
-                    time.sleep(0.5)
-    def stop(self):
-        self._stop = True
+        self.signals.done.emit(self.text, find_sql_error(self.text))
 
 # ---------------- Migration worker ----------------
 class MigrationWorker(QtCore.QThread):
@@ -448,23 +724,14 @@ class MigrationWorker(QtCore.QThread):
         self.dbo = dbo; self.table = table; self.query = query; self.save_csv = save_csv
     def run(self):
         try:
-            try:
-                self.progress.emit("[DEBUG] Query will be passed in-memory.\n")
-            except Exception as e:
-                self.progress.emit(f"[WARN] Could not write query.py: {e}\n")
+            self.progress.emit("[DEBUG] Query will be passed in-memory.\n")
             self.progress.emit("[INFO] Starting migration...\n")
-            try:
-                from main import main as user_main
-            except Exception:
-                def user_main(dbo, table, save_csv=False):
-                    import pandas as _pd; time.sleep(0.8)
-                    df = _pd.DataFrame({"id":[1,2,3],"val":["a","b","c"]})
-                    if save_csv:
-                        df.to_csv("migration_sample.csv", index=False, encoding="utf-8-sig")
-                    return df
-            df = user_main(self.dbo, self.table, self.query, save_csv=self.save_csv)
+            # an import failure (missing driver, bad config) must fail the run
+            from main import main as user_main
+            # (rows, schema_map, csv_path): rows are streamed, never returned
+            result = user_main(self.dbo, self.table, self.query, save_csv=self.save_csv)
             self.progress.emit("[SUCCESS] Migration finished successfully.\n")
-            self.done.emit(df)
+            self.done.emit(result)
         except Exception as e:
             tb = traceback.format_exc()
             self.progress.emit(f"[ERROR] Exception during migration:\\n{tb}\n")
@@ -478,6 +745,7 @@ class MigrationWindow(QtWidgets.QMainWindow):
         self.setWindowTitle(APP_TITLE)
         self.resize(1280, 820)
         self.dark_theme = True
+        self._icon_cache: dict[tuple, QtGui.QIcon] = {}  # (name, dark_theme) -> icon
 
         central = QtWidgets.QWidget()
         self.setCentralWidget(central)
@@ -617,18 +885,36 @@ class MigrationWindow(QtWidgets.QMainWindow):
         rl.addLayout(lh)
 
         self.log = QtWidgets.QTextEdit(); self.log.setReadOnly(True); self.log.setLineWrapMode(QtWidgets.QTextEdit.LineWrapMode.NoWrap);self.log.setPlainText("Waiting for migration to start..."); self.log.setObjectName("log")
+        self.log.document().setMaximumBlockCount(5000)  # oldest lines drop off; bounds memory
         rl.addWidget(self.log, 3)
+        # incoming log lines are buffered and painted at most every 50 ms
+        self._log_buf: list[str] = []
+        self._log_timer = QtCore.QTimer(self)
+        self._log_timer.setSingleShot(True)
+        self._log_timer.setInterval(50)
+        self._log_timer.timeout.connect(self._flush_log)
 
         splitter.addWidget(right)
         splitter.setStretchFactor(0,0); splitter.setStretchFactor(1,1)
 
         # state
-        self.migration_worker = None; self.last_df = None
-
-        # log tailer
-        self.logtail = LogTailWorker(LOG_FILE)
-        self.logtail.new_line.connect(self.on_new_log_line)
-        self.logtail.start()
+        self.migration_worker = None; self.last_csv = None
+        # (query text, find_sql_error result) for the last checked text; kept warm in the
+        # background while typing so validate_query rarely has to lex on the UI thread
+        self._last_syntax: tuple[str, object] = ("", None)
+        self._syntax_timer = QtCore.QTimer(self)
+        self._syntax_timer.setSingleShot(True)
+        self._syntax_timer.setInterval(300)
+        self._syntax_timer.timeout.connect(self._start_syntax_check)
+        self.editor.textChanged.connect(self._syntax_timer.start)
+
+        # log tailer: event driven, reads only what was appended since the last change
+        Path(LOG_FILE).touch(exist_ok=True)
+        _st = os.stat(LOG_FILE)
+        self._log_pos, self._log_ino = _st.st_size, _st.st_ino
+        self._log_rearm_delay = 0
+        self._fw = QtCore.QFileSystemWatcher([LOG_FILE], self)
+        self._fw.fileChanged.connect(self._on_log_file_changed)
 
         # shortcuts
         QtGui.QShortcut(QtGui.QKeySequence("Ctrl+Return"), self, activated=self.start_migration)
@@ -711,17 +997,62 @@ class MigrationWindow(QtWidgets.QMainWindow):
 
     # ---------------- logs ----------------
     def on_new_log_line(self, line):
-        ll = line.lower()
-        if "error" in ll or "[error]" in ll or "traceback" in ll:
-            append_colored(self.log, line, "#ff6b6b")
-        elif "success" in ll or "completed" in ll or "[success]" in ll or "ok" in ll:
-            append_colored(self.log, line, "#67e667")
-        elif "warn" in ll or "warning" in ll:
-            append_colored(self.log, line, "#f7d06b")
-        elif "info" in ll:
-            append_colored(self.log, line, "#7fb6ff")
-        else:
-            append_colored(self.log, line, "#c7c7c7")
+        self.on_new_log_batch([line])
+
+    def on_new_log_batch(self, lines):
+        self._log_buf.extend(lines)
+        if not self._log_timer.isActive():
+            self._log_timer.start()
+
+    def _flush_log(self):
+        if not self._log_buf:
+            return
+        lines, self._log_buf = self._log_buf, []
+        self.log.setUpdatesEnabled(False)
+        try:
+            append_colored_batch(self.log, [(line, log_color(line)) for line in lines])
+        finally:
+            self.log.setUpdatesEnabled(True)
+
+    def _on_log_file_changed(self, path):
+        # a rotated/replaced file drops out of the watcher; re-arm it
+        if path not in self._fw.files():
+            if not os.path.exists(path):
+                # mid-rotation the new file may not exist yet; retry with back-off
+                self._log_rearm_delay = min(max(self._log_rearm_delay * 2, 100), 5000)
+                QtCore.QTimer.singleShot(self._log_rearm_delay, partial(self._on_log_file_changed, path))
+                return
+            self._fw.addPath(path)
+        self._log_rearm_delay = 0
+        try:
+            st = os.stat(path)
+            if st.st_ino != self._log_ino or st.st_size < self._log_pos:  # rotated or truncated
+                # RotatingFileHandler renamed the old file to .1; pick up what it got
+                # after our last read before starting over on the new file
+                rotated = st.st_ino != self._log_ino or not st.st_ino
+                old = self._read_log_from(path + ".1", self._log_pos) if rotated else b""
+                self._log_pos, self._log_ino = 0, st.st_ino
+                if old:
+                    self.on_new_log_batch(old.decode("utf-8", errors="ignore").splitlines(keepends=True))
+            data = self._read_log_from(path, self._log_pos)
+        except OSError:
+            return
+        # only consume complete lines; a partial tail is picked up on the next change
+        end = data.rfind(b"\n") + 1
+        if not end:
+            return
+        self._log_pos += end
+        lines = data[:end].decode("utf-8", errors="ignore").splitlines(keepends=True)
+        self.on_new_log_batch(lines)
+
+    @staticmethod
+    def _read_log_from(path, pos):
+        try:
+            with open(path, "rb") as f:
+                f.seek(pos)
+                return f.read()
+        except FileNotFoundError:
+            return b""
 
     # ---------------- actions ----------------
     def start_migration(self):
@@ -751,15 +1082,16 @@ class MigrationWindow(QtWidgets.QMainWindow):
         self.migration_worker.failed.connect(self._migration_failed)
         self.migration_worker.start()
 
-    def _migration_done(self, df):
-        self.last_df = df
-        self.export_btn.setEnabled(df is not None)
-        append_colored(self.log, "[SUCCESS] Migration completed and DataFrame returned.\n", "#67e667")
+    def _migration_done(self, result):
+        rows, _schema, csv_path = result
+        self.last_csv = csv_path
+        self.export_btn.setEnabled(csv_path is not None)
+        self.on_new_log_line(f"[SUCCESS] Migration completed: {rows:,} rows transferred.\n")
         QtWidgets.QMessageBox.information(self, "Migration Completed", "Data migration completed successfully.")
         self._restore_after_run()
 
     def _migration_failed(self, err):
-        append_colored(self.log, f"[ERROR] Migration failed: {err}\n", "#ff6b6b")
+        self.on_new_log_line(f"[ERROR] Migration failed: {err}\n")
         QtWidgets.QMessageBox.critical(self, "Migration Failed", f"Migration failed:\n{err}")
         self._restore_after_run()
 
@@ -769,16 +1101,14 @@ class MigrationWindow(QtWidgets.QMainWindow):
         self.auto_toggle.setEnabled(True)
 
     def export_csv(self):
-        if self.last_df is None:
-            QtWidgets.QMessageBox.warning(self, "No Data", "No data available to export. Run migration first.")
-            return
-        if pd is None:
-            QtWidgets.QMessageBox.warning(self, "Dependency Missing", "pandas not installed; cannot export.")
+        # rows are streamed during migration, so the only copy kept is the auto-saved CSV
+        if not self.last_csv or not Path(self.last_csv).exists():
+            QtWidgets.QMessageBox.warning(self, "No Data", "No data available to export. Turn on \"Auto save fetched data as CSV\" and run migration first.")
             return
         fn, _ = QtWidgets.QFileDialog.getSaveFileName(self, "Export to CSV", str(Path.home() / "export.csv"), "CSV Files (*.csv)")
         if fn:
             try:
-                self.last_df.to_csv(fn, index=False, encoding="utf-8-sig")
+                shutil.copyfile(self.last_csv, fn)
                 QtWidgets.QMessageBox.information(self, "Exported", f"Data exported to:\n{fn}")
             except Exception as e:
                 QtWidgets.QMessageBox.critical(self, "Export Failed", f"Could not export CSV:\n{e}")
@@ -793,15 +1123,9 @@ class MigrationWindow(QtWidgets.QMainWindow):
             "Provide steps to reproduce and any screenshots. The log folder will be opened now."
         )
         QtWidgets.QMessageBox.information(self, "Report Issue — Instructions", msg)
-        try:
-            if sys.platform.startswith("win"):
-                os.startfile(str(logp.parent))
-            elif sys.platform.startswith("darwin"):
-                os.system(f'open \"{logp.parent}\"')
-            else:
-                os.system(f'xdg-open \"{logp.parent}\"')
-        except Exception as e:
-            QtWidgets.QMessageBox.warning(self, "Open Folder Failed", f"Could not open log folder: {e}")
+        # hands off to the platform file manager without a shell or blocking the UI
+        if not QtGui.QDesktopServices.openUrl(QtCore.QUrl.fromLocalFile(str(logp.parent))):
+            QtWidgets.QMessageBox.warning(self, "Open Folder Failed", f"Could not open log folder: {logp.parent}")
             
             
     def show_shortcuts_dialog(self):
@@ -849,80 +1173,84 @@ class MigrationWindow(QtWidgets.QMainWindow):
         
         
     def load_theme_icon(self, name, size=16):
-        folder = "dark" if self.dark_theme else "light"
-        path = BASE / "icons" / folder / f"{name}.svg"
-        if path.exists():
-            r = QtSvg.QSvgRenderer(str(path))
-            pix = QtGui.QPixmap(size, size)
-            pix.fill(QtCore.Qt.GlobalColor.transparent)
-            painter = QtGui.QPainter(pix)
-            r.render(painter)
-            painter.end()
-            return QtGui.QIcon(pix)
-        return QtGui.QIcon()
+        # `size` is kept for callers but unused: Qt's SVG icon engine rasterizes
+        # lazily at whatever size (and DPR) the icon is painted, caching per size.
+        # Keys include the theme, so both variants stay warm across toggles.
+        key = (name, self.dark_theme)
+        ic = self._icon_cache.get(key)
+        if ic is None:
+            path = BASE / "icons" / ("dark" if self.dark_theme else "light") / f"{name}.svg"
+            ic = QtGui.QIcon(str(path)) if path.exists() else QtGui.QIcon()
+            self._icon_cache[key] = ic
+        return ic
 
 
 
     # ---------------- validation & format ----------------
     def validate_query(self, q: str) -> bool:
-        ql = q.strip().lower()
-        if not ql.startswith("select"):
+        if not _SELECT_RE.match(q):
             QtWidgets.QMessageBox.critical(self, "Invalid Query", "Only SELECT statements are allowed for migration.")
             return False
-        forbidden = ["insert","update","delete","drop","alter","truncate","merge","create","exec","grant","revoke"]
-        for fwd in forbidden:
-            if f"{fwd} " in ql or f"{fwd}(" in ql:
-                QtWidgets.QMessageBox.critical(self, "Unsafe Query Detected", f"The query contains a potentially dangerous SQL command: '{fwd.upper()}'. Only read-only SELECT queries are allowed.")
-                return False
-        if "from" not in ql:
+        m = _FORBIDDEN_RE.search(q)
+        if m:
+            QtWidgets.QMessageBox.critical(self, "Unsafe Query Detected", f"The query contains a potentially dangerous SQL command: '{m.group(1).upper()}'. Only read-only SELECT queries are allowed.")
+            return False
+        if not _FROM_RE.search(q):
             QtWidgets.QMessageBox.critical(self, "Malformed Query", "Query seems invalid — missing a FROM clause.")
             return False
-        if sqlparse:
-            try:
-                parsed = sqlparse.parse(q)
-                if not parsed:
-                    raise ValueError("Unrecognized SQL")
-            except Exception as e:
-                self.underline_error_all()
-                QtWidgets.QMessageBox.critical(self, "SQL Syntax Error", f"SQL syntax appears invalid:\n{e}")
-                return False
+        if q == self._last_syntax[0]:
+            err = self._last_syntax[1]
+        else:
+            err = find_sql_error(q)
+            self._last_syntax = (q, err)
+        if err:
+            # offsets are into the stripped query; shift past the editor's leading whitespace
+            raw = self.editor.toPlainText()
+            self.underline_error_all(err[0] + len(raw) - len(raw.lstrip()))
+            QtWidgets.QMessageBox.critical(self, "SQL Syntax Error", f"SQL syntax appears invalid:\n{err[1]}")
+            return False
         self.clear_error_underlines()
         return True
 
-    def underline_error_all(self):
+    def _start_syntax_check(self):
+        q = self.editor.toPlainText().strip()
+        if q and q != self._last_syntax[0]:
+            task = SyntaxCheckTask(q)
+            task.signals.done.connect(self._on_syntax_checked)
+            QtCore.QThreadPool.globalInstance().start(task)
+
+    def _on_syntax_checked(self, text, err):
+        self._last_syntax = (text, err)
+
+    def underline_error_all(self, offset=None):
+        # underline from the error offset to the end of its line (whole text if unknown)
         doc = self.editor.document()
-        cursor = QtGui.QTextCursor(doc)
-        cursor.select(QtGui.QTextCursor.SelectionType.Document)
-        fmt = QtGui.QTextCharFormat()
-        try:
-            fmt.setUnderlineStyle(QtGui.QTextCharFormat.UnderlineStyle.WaveUnderline)
-        except Exception:
-            fmt.setUnderlineStyle(QtGui.QTextCharFormat.UnderlineStyle.SingleUnderline)
-        fmt.setUnderlineColor(QtGui.QColor("#ff6b6b"))
-        cursor.setCharFormat(fmt)
+        if offset is None:
+            start, end = 0, doc.characterCount() - 1
+        else:
+            block = doc.findBlock(offset)
+            start = offset
+            end = max(offset + 1, block.position() + block.length() - 1)
+        self.editor.set_error_range(start, end)
 
     def clear_error_underlines(self):
-        doc = self.editor.document()
-        cursor = QtGui.QTextCursor(doc)
-        cursor.select(QtGui.QTextCursor.SelectionType.Document)
-        cursor.setCharFormat(QtGui.QTextCharFormat())
+        self.editor.clear_error()
 
     def format_sql(self):
-        if not sql_format:
+        if not _get_sql_format():
             QtWidgets.QMessageBox.warning(self, "Format SQL", "sqlparse is not installed; cannot format.")
             return
         raw = self.editor.toPlainText()
         try:
-            formatted = sql_format(raw, reindent=True, keyword_case='upper')
+            formatted = format_query(raw)
             self.editor.setPlainText(formatted)
         except Exception as e:
             QtWidgets.QMessageBox.warning(self, "Format Error", f"Could not format SQL:\n{e}")
 
     def closeEvent(self, ev):
         try:
-            if hasattr(self, "logtail") and self.logtail.isRunning():
-                self.logtail.stop()
-                self.logtail.wait(1000)
+            if hasattr(self, "_fw"):
+                self._fw.removePaths(self._fw.files())
         except:
             pass
         super().closeEvent(ev)
@@ -1,62 +1,111 @@
-import oracledb
-import pyodbc
-import pandas as pd
 import logging
+from logging.handlers import MemoryHandler, RotatingFileHandler
+import csv
 import sys
-from tqdm import tqdm
+import threading
 from dotenv import load_dotenv
 import os
-import importlib.util
-import pathlib
-
-def load_query_module(base_dir):
-    query_file = pathlib.Path(base_dir) / "query.py"
-    spec = importlib.util.spec_from_file_location("query", query_file)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
-
+import functools
 
 def is_exe():
     return getattr(sys, "frozen", False)
 
+# oracledb, pyodbc and tqdm are imported inside the functions that use them, so
+# importing this module (and starting the UI) doesn't pay for their C extensions.
+class _NullBar:
+    """No-op stand-in for tqdm where no console is visible."""
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        return False
+    def update(self, n=1):
+        pass
+
 def safe_tqdm(*args, **kwargs):
+    # frozen exe has no console: skip tqdm entirely rather than build a disabled bar
     if is_exe():
-        kwargs["disable"] = True
+        return _NullBar()
+    from tqdm import tqdm
     return tqdm(*args, **kwargs)
 
 
 load_dotenv()
 
+class _PeriodicMemoryHandler(MemoryHandler):
+    """MemoryHandler that also flushes `interval` seconds after a record lands in an empty buffer."""
+    def __init__(self, capacity, interval, **kwargs):
+        super().__init__(capacity, **kwargs)
+        self.interval = interval
+        self._timer = None
+
+    def emit(self, record):
+        super().emit(record)
+        # a one-shot timer armed only while records are waiting: a long load that logs
+        # nothing new still reaches the file, and an idle app has no thread ticking
+        if self.buffer and self._timer is None:
+            self._timer = threading.Timer(self.interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            super().flush()
+
+
 LOG_FILE = "oracle_to_mssql.log"
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s",
-    handlers=[
-        logging.FileHandler(LOG_FILE, mode="a", encoding="utf-8"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+_log_fmt = logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
+# File writes are buffered: flushed on ERROR, every 1024 records, at most a second
+# after the first buffered record (the UI tails this file), and at interpreter exit.
+_file_handler = RotatingFileHandler(LOG_FILE, maxBytes=10_000_000, backupCount=3, encoding="utf-8")
+_file_handler.setFormatter(_log_fmt)
+_log_buffer = _PeriodicMemoryHandler(1024, 1.0, flushLevel=logging.ERROR, target=_file_handler)
+_console_handler = logging.StreamHandler(sys.stdout)
+_console_handler.setFormatter(_log_fmt)
+if is_exe():
+    # no visible console in the frozen build; skip formatting routine records for it
+    _console_handler.setLevel(logging.WARNING)
+logging.basicConfig(level=logging.INFO, handlers=[_log_buffer, _console_handler])
 logger = logging.getLogger(__name__)
 
 
+# (username, dsn) -> oracledb pool. The UI imports this module once and calls main()
+# per migration, so later runs reuse an open session instead of a fresh handshake/auth.
+_oracle_pools = {}
+
 def connect_oracle(username: str, password: str, host_name : str, port : int, sid : str):
+    import oracledb
     try:
         # lib_dir = r"C:\oracle\instantclient_19_28"  # <- your folder path
         # oracledb.init_oracle_client(lib_dir=lib_dir)
         # print(f"✅ Oracle Client initialized in thick mode from {lib_dir}")
         dsn = oracledb.makedsn(host_name, port, sid)
-        conn = oracledb.connect(user=username, password=password, dsn=dsn)
+        pool = _oracle_pools.get((username, dsn))
+        if pool is None:
+            pool = oracledb.create_pool(user=username, password=password, dsn=dsn,
+                                        min=1, max=2, increment=1)
+            _oracle_pools[(username, dsn)] = pool
+        # close() on a pooled connection releases it back to the pool
+        conn = pool.acquire()
         logger.info(f"✅ Connected to Oracle DB - {username}")
         return conn
     except Exception as e:
         logger.exception(f"❌ Oracle connection failed: {e}")
         sys.exit(1)
 
+SQL_ATTR_PACKET_SIZE = 112  # ODBC connection attribute (sqlext.h); pyodbc doesn't export it
+
+
 def connect_mssql(server: str, database: str, username: str, password: str, driver: str = "ODBC Driver 17 for SQL Server", encrypt:str = "yes", TrustServerCertificate:str = "yes"):
+    import pyodbc
     try:
         conn_str = f"DRIVER={{{driver}}};SERVER={server};DATABASE={database};UID={username};PWD={password};Encrypt={encrypt};TrustServerCertificate={TrustServerCertificate};"
-        conn = pyodbc.connect(conn_str, autocommit=False)
+        # Larger TDS packets mean fewer round trips per fast_executemany batch
+        # (ODBC default is 4 KB; 32767 is the SQL Server maximum).
+        conn = pyodbc.connect(conn_str, autocommit=False,
+                              attrs_before={SQL_ATTR_PACKET_SIZE: 32767})
         logger.info(f"✅ Connected to MS SQL Server - {server}")
         return conn
     except Exception as e:
@@ -137,6 +186,25 @@ def connect_mssql(server: str, database: str, username: str, password: str, driv
 #         return "NVARCHAR(255)"
 
 
+# Ordered (substring, MSSQL type) pairs; first match wins, so order matters
+# (e.g. "interval" hits "int", "long raw" hits "raw" before "long").
+_TYPE_TABLE = (
+    ("int", "INT"),                     # Oracle INTEGER maps cleanly
+    ("float", "FLOAT"),                 # FLOAT / BINARY_FLOAT
+    ("double", "FLOAT"),                # BINARY_DOUBLE
+    ("date", "DATETIME2"),
+    ("timestamp", "DATETIME2"),
+    ("time", "TIME"),
+    ("clob", "NVARCHAR(MAX)"),
+    ("blob", "VARBINARY(MAX)"),
+    ("raw", "VARBINARY(MAX)"),          # RAW / LONG RAW
+    ("xml", "XML"),                     # XMLTYPE
+    ("long", "NVARCHAR(MAX)"),          # LONG / LONG VARCHAR
+    ("bfile", "VARBINARY(MAX)"),
+)
+
+
+@functools.lru_cache(maxsize=512)
 def map_oracle_to_mssql_dtype(dtype: str, precision=None, scale=None, length=None) -> str:
     """
     Universal Oracle → MSSQL datatype mapper.
@@ -175,60 +243,10 @@ def map_oracle_to_mssql_dtype(dtype: str, precision=None, scale=None, length=Non
 
         return "DECIMAL(38, 10)"  # safe fallback
 
-    # Oracle INTEGER maps cleanly
-    if "int" in dtype:
-        return "INT"
-
-    # -----------------------------
-    # FLOAT / BINARY_FLOAT / BINARY_DOUBLE
-    # -----------------------------
-    if "float" in dtype or "binary_float" in dtype or "double" in dtype or "binary_double" in dtype:
-        return "FLOAT"
-
-    # -----------------------------
-    # DATE / TIME TYPES
-    # -----------------------------
-    if "date" in dtype:
-        return "DATETIME2"
-
-    if "timestamp" in dtype:
-        return "DATETIME2"
-
-    if "time" in dtype:
-        return "TIME"
-
-    # -----------------------------
-    # LOB TYPES
-    # -----------------------------
-    if "clob" in dtype:
-        return "NVARCHAR(MAX)"
-
-    if "blob" in dtype:
-        return "VARBINARY(MAX)"
-
-    # -----------------------------
-    # RAW / LONG RAW
-    # -----------------------------
-    if "raw" in dtype:
-        return "VARBINARY(MAX)"
-
-    # -----------------------------
-    # XMLTYPE
-    # -----------------------------
-    if "xml" in dtype:
-        return "XML"
-
-    # -----------------------------
-    # LONG / LONG VARCHAR
-    # -----------------------------
-    if "long" in dtype:
-        return "NVARCHAR(MAX)"
-
-    # -----------------------------
-    # BFILE
-    # -----------------------------
-    if "bfile" in dtype:
-        return "VARBINARY(MAX)"
+    # Everything else is a first-substring-match lookup (see _TYPE_TABLE)
+    for needle, mssql_type in _TYPE_TABLE:
+        if needle in dtype:
+            return mssql_type
 
     # -----------------------------
     # DEFAULT FALLBACK
@@ -236,8 +254,34 @@ def map_oracle_to_mssql_dtype(dtype: str, precision=None, scale=None, length=Non
     return "NVARCHAR(255)"
 
     
+# Rows per Oracle network round trip (cursor.arraysize). Lower it for very wide rows
+# to cap the memory held per round trip.
+def _env_fetch_size(default=5000):
+    raw = os.getenv("ORACLE_ARRAYSIZE")
+    if not raw:
+        return default
+    try:
+        size = int(raw)
+    except ValueError:
+        size = 0
+    if size <= 0:
+        # a typo here must not break importing this module; fall back and say so
+        logger.warning(f"⚠️ Ignoring invalid ORACLE_ARRAYSIZE={raw!r}; using {default}")
+        return default
+    return size
+
+FETCH_SIZE = _env_fetch_size()
+
+
 def fetch_oracle_data(oracle_conn, query):
+    """
+    Execute the query and return (cursor, schema_map) without reading any rows.
+    Rows are streamed afterwards with iter_oracle_batches().
+    """
     cursor = oracle_conn.cursor()
+    cursor.arraysize = FETCH_SIZE
+    # one more than arraysize so the prefetch on execute and the first fetch overlap
+    cursor.prefetchrows = FETCH_SIZE + 1
     cursor.execute(query)
 
     columns = [col[0] for col in cursor.description]
@@ -248,24 +292,110 @@ def fetch_oracle_data(oracle_conn, query):
         except AttributeError:
             types.append(getattr(col[1], "__name__", "str"))
 
-    chunk_size = 5000
-    all_rows = []
-    total_rows = 0
+    return cursor, dict(zip(columns, types))
+
+
+def iter_oracle_batches(cursor, chunk_size=FETCH_SIZE):
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield rows
+
+
+def scrub_nan(batches, nan_cols):
+    """
+    Replace float NaN with None in the given column positions, in place per batch.
+    Only BINARY_FLOAT/BINARY_DOUBLE columns can carry NaN and SQL Server FLOAT rejects
+    it; rows without NaN are left as the tuples the driver returned.
+    """
+    for rows in batches:
+        for r, row in enumerate(rows):
+            for i in nan_cols:
+                v = row[i]
+                if v != v:  # only NaN is unequal to itself
+                    rows[r] = tuple(None if (j in nan_cols and x != x) else x for j, x in enumerate(row))
+                    break
+        yield rows
+
+
+# Plain UTF-8 by default; set CSV_ENCODING=utf-8-sig if the CSV is opened in Excel
+CSV_ENCODING = os.getenv("CSV_ENCODING") or "utf-8"
+
+
+class CsvTee:
+    """
+    Pass batches through unchanged while also writing them to a CSV file.
+    The export is best effort: any open/write/encode error is logged, the partial file
+    is removed and the batches keep flowing. `path` is set only once a non-empty
+    result has been written completely.
+    """
+    def __init__(self, batches, columns, export_path):
+        self.batches = batches
+        self.columns = columns
+        self.export_path = export_path
+        self.path = None
+
+    def __iter__(self):
+        batches = iter(self.batches)
+        f = writer = None
+        try:
+            for rows in batches:
+                try:
+                    if f is None:
+                        # opened on the first batch so an empty result writes no file
+                        f = open(self.export_path, "w", newline="", encoding=CSV_ENCODING, buffering=1 << 20)
+                        writer = csv.writer(f)
+                        writer.writerow(self.columns)
+                    writer.writerows(rows)
+                except Exception as e:
+                    self._abandon(f, e)
+                    yield rows
+                    yield from batches
+                    return
+                yield rows
+            if f is not None:
+                try:
+                    f.close()
+                except Exception as e:
+                    self._abandon(f, e)
+                    return
+                self.path = self.export_path
+                logger.info(f"💾 Auto-exported fetched data to {self.export_path}")
+        finally:
+            if f is not None and not f.closed:
+                f.close()
+
+    def _abandon(self, f, e):
+        logger.warning(f"⚠️ Failed to export CSV automatically: {e}")
+        if f is not None:
+            try:
+                f.close()
+            except Exception:
+                pass
+            try:
+                os.remove(self.export_path)
+            except OSError:
+                pass
 
-    logger.info("📥 Fetching data from Oracle...")
-    with safe_tqdm(unit="rows", desc="Fetching", ncols=90) as pbar:
-        while True:
-            rows = cursor.fetchmany(chunk_size)
-            if not rows:
-                break
-            all_rows.extend(rows)
-            total_rows += len(rows)
-            pbar.update(len(rows))
 
-    df = pd.DataFrame(all_rows, columns=columns)
-    cursor.close()
-    logger.info(f"✅ Completed fetching {total_rows:,} rows and {len(columns)} columns.")
-    return df, dict(zip(columns, types))
+def quote_ident(name) -> str:
+    """Bracket-quote a SQL Server identifier, escaping any closing bracket in it."""
+    return "[" + str(name).replace("]", "]]") + "]"
+
+
+_EXISTS_QUERY = """
+SELECT
+    (SELECT 1 FROM sys.schemas WHERE name = ?),
+    (SELECT 1 FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = ? AND TABLE_NAME = ?)
+"""
+
+
+@functools.lru_cache(maxsize=64)
+def _create_table_sql(schema, pure_table, columns):
+    """Build the CREATE TABLE statement; cached so repeat migrations reuse it."""
+    col_defs = ", ".join(f"{quote_ident(col)} {map_oracle_to_mssql_dtype(dtype)}" for col, dtype in columns)
+    return f"CREATE TABLE {quote_ident(schema)}.{quote_ident(pure_table)} ({col_defs})"
 
 
 def create_table_if_not_exists(mssql_conn, table_name, schema_map):
@@ -276,26 +406,16 @@ def create_table_if_not_exists(mssql_conn, table_name, schema_map):
     else:
         schema, pure_table = "dbo", table_name
 
-    check_schema_query = f"""
-    IF NOT EXISTS (SELECT * FROM sys.schemas WHERE name = '{schema}')
-        EXEC('CREATE SCHEMA [{schema}]')
-    """
-    cursor.execute(check_schema_query)
-
-    check_table_query = f"""
-    IF NOT EXISTS (
-        SELECT * FROM INFORMATION_SCHEMA.TABLES 
-        WHERE TABLE_SCHEMA = '{schema}' AND TABLE_NAME = '{pure_table}'
-    )
-    BEGIN
-        EXEC('CREATE TABLE [{schema}].[{pure_table}] (
-            {', '.join([f'[{col}] {map_oracle_to_mssql_dtype(dtype)}' for col, dtype in schema_map.items()])}
-        )')
-    END
-    """
-
+    # existence checks are parameterized and the DDL runs directly (no EXEC('...')
+    # wrapper), so SQL Server can reuse cached plans and names can't break out of quotes
     try:
-        cursor.execute(check_table_query)
+        # both lookups in one fixed-text, parameterized round trip (NULL = missing)
+        cursor.execute(_EXISTS_QUERY, schema, schema, pure_table)
+        schema_exists, table_exists = cursor.fetchone()
+        if schema_exists is None:
+            cursor.execute(f"CREATE SCHEMA {quote_ident(schema)}")
+        if table_exists is None:
+            cursor.execute(_create_table_sql(schema, pure_table, tuple(schema_map.items())))
         mssql_conn.commit()
         logger.info(f"✅ Table [{schema}].[{pure_table}] verified or created.")
     except Exception as e:
@@ -305,40 +425,50 @@ def create_table_if_not_exists(mssql_conn, table_name, schema_map):
     finally:
         cursor.close()
 
-def insert_to_mssql(df, mssql_conn, target_table, batch_size=1000):
-    df = df.where(pd.notnull(df), None)
+def insert_to_mssql(batches, columns, mssql_conn, target_table):
+    """
+    Insert row batches (lists of tuples) as they arrive; returns the number of rows inserted.
+    Each batch goes to one executemany unchanged, and the whole load is one
+    transaction: committed once at the end, rolled back on any failure.
+    """
     cursor = mssql_conn.cursor()
 
-    columns = list(df.columns)
     placeholders = ", ".join(["?"] * len(columns))
-    col_names = ", ".join([f"[{col}]" for col in columns])
+    col_names = ", ".join([quote_ident(col) for col in columns])
 
     if "." in target_table:
         schema, pure_table = target_table.split(".", 1)
-        full_table = f"[{schema}].[{pure_table}]"
+        full_table = f"{quote_ident(schema)}.{quote_ident(pure_table)}"
     else:
-        full_table = f"[dbo].[{target_table}]"
+        full_table = f"[dbo].{quote_ident(target_table)}"
 
     insert_query = f"INSERT INTO {full_table} ({col_names}) VALUES ({placeholders})"
-    data = [tuple(row) for row in df.itertuples(index=False, name=None)]
+    total_rows = sent = 0
 
     try:
         cursor.fast_executemany = True
-        logger.info(f"📤 Inserting {len(data):,} rows into {full_table}...")
-
-        with safe_tqdm(total=len(data), unit="rows", desc="Inserting", ncols=90) as pbar:
-            for start in range(0, len(data), batch_size):
-                batch = data[start:start + batch_size]
-                cursor.executemany(insert_query, batch)
-                mssql_conn.commit()
-                pbar.update(len(batch))
-
-        logger.info(f"✅ Inserted {len(data):,} rows into {full_table}.")
+        # no per-statement row-count messages back from the server during the load
+        cursor.execute("SET NOCOUNT ON")
+        logger.info(f"📤 Streaming rows from Oracle into {full_table}...")
+
+        with safe_tqdm(unit="rows", desc="Migrating", ncols=90) as pbar:
+            for rows in batches:
+                # fetchmany already returns a list of FETCH_SIZE tuples; send it as-is
+                cursor.executemany(insert_query, rows)
+                sent += len(rows)
+                pbar.update(len(rows))
+        mssql_conn.commit()
+        # rows only count once the transaction holding them is committed
+        total_rows = sent
+        logger.info(f"✅ Inserted {total_rows:,} rows into {full_table}.")
     except Exception as e:
         mssql_conn.rollback()
         logger.exception(f"❌ Insert failed for {full_table}")
+        # a half-read Oracle cursor must fail the migration, not report a partial count
+        raise
     finally:
         cursor.close()
+    return total_rows
 
 def main(dbo: str, table_name: str, query: str, save_csv: bool = False):
     import tkinter as tk
@@ -363,42 +493,44 @@ def main(dbo: str, table_name: str, query: str, save_csv: bool = False):
         password=os.getenv("SQL_PASSWORD")
     )
 
-    df = None
+    total_rows = 0
+    schema_map = {}
+    export_path = None
     try:
         # query is passed directly from MigrationWorker
-        df, schema_map = fetch_oracle_data(oracle_conn, query)
-
-
-        # --- 1️⃣ Fetch Data from Oracle ---
-        #df, schema_map = fetch_oracle_data(oracle_conn, query.oracle_query)
-        # --- 2️⃣ Auto-export if enabled ---
-        if save_csv and not df.empty:
-            export_path = f"{table_name}_fetched_data.csv"
-            try:
-                df.to_csv(export_path, index=False, encoding="utf-8-sig")
-                logger.info(f"💾 Auto-exported fetched data to {export_path}")
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to export CSV automatically: {e}")
-        # --- 3️⃣ Create Table (if not exists) ---
-        create_table_if_not_exists(mssql_conn, target_table, schema_map)
-        # --- 4️⃣ Insert Fetched Data into MSSQL ---
-        insert_to_mssql(df, mssql_conn, target_table)
+        # --- 1️⃣ Execute on Oracle (rows are streamed below, never held in full) ---
+        ora_cursor, schema_map = fetch_oracle_data(oracle_conn, query)
+        columns = list(schema_map)
+        try:
+            # --- 2️⃣ Create Table (if not exists) ---
+            create_table_if_not_exists(mssql_conn, target_table, schema_map)
+            # --- 3️⃣ Stream batches into MSSQL, teeing to CSV if enabled ---
+            batches = iter_oracle_batches(ora_cursor)
+            nan_cols = frozenset(i for i, t in enumerate(schema_map.values())
+                                 if "float" in t.lower() or "double" in t.lower())
+            if nan_cols:
+                batches = scrub_nan(batches, nan_cols)
+            tee = None
+            if save_csv:
+                batches = tee = CsvTee(batches, columns, f"{table_name}_fetched_data.csv")
+            total_rows = insert_to_mssql(batches, columns, mssql_conn, target_table)
+            if tee is not None:
+                export_path = tee.path
+        finally:
+            ora_cursor.close()
         logger.info("🏁 Data transfer complete.")
     except Exception as e:
         logger.exception("🚨 Fatal error during transfer")
         raise Exception("Error Occured: Please refer to the log or report the issue.")
 
     finally:
+        # both return to their pools: oracledb's session pool and the ODBC driver
+        # manager's pool (pyodbc.pooling, on by default) for the identical conn string
         oracle_conn.close()
         mssql_conn.close()
-        file_path = "query.py"
-        if os.path.exists(file_path):
-            os.remove(file_path)
-            print(f"File '{file_path}' removed successfully.")
-        else:
-            print(f"File '{file_path}' does not exist.")
         logger.info("🔒 Connections closed.")
-    return df
+        _log_buffer.flush()
+    return total_rows, schema_map, export_path
 
 
 